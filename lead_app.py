@@ -2,8 +2,29 @@ import streamlit as st
 import requests
 import pandas as pd
 import re
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from selectolax.parser import HTMLParser
 from urllib.parse import quote_plus
+from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from diskcache import Cache
+
+USER_AGENT = "Mozilla/5.0 (compatible; LeadFinder/1.0)"
+# seconds; Yelp "Newest" goes stale quickly. CACHE_TTL bounds the age of a
+# scraped page across both cache layers: the in-memory layer can re-cache a
+# disk entry just before it expires, so disk gets CACHE_TTL - MEMORY_TTL.
+CACHE_TTL = 300
+MEMORY_TTL = 60
+LEAD_COLUMNS = ("Name", "Yelp Link", "Address", "Phone", "Has Website")
+# US numbers: (555) 123-4567, 555-123-4567, 555.123.4567, +1 555 123 4567,
+# +15551234567; otherwise the area code is either balanced parens or followed
+# by a separator, so bare digit runs and "(555 123-4567" don't match
+_PHONE_RE = re.compile(
+    r"(?<![\d(])(?:\+1\d{10}|(?:\+?1[-.\s]*)?"
+    r"(?:\(\d{3}\)[-.\s]*|\d{3}[-.\s]+)\d{3}[-.\s]+\d{4})(?!\d)"
+)
+_NON_DIGIT_RE = re.compile(r"\D")
 
 st.set_page_config(layout="wide")
 st.title("🚀 Lead Finder: Yelp Newest with No Website")
@@ -21,66 +42,106 @@ if st.sidebar.button("Fetch Leads"):
 else:
     st.session_state.fetch = st.session_state.get("fetch", False)
 
+# --- Helper: shared HTTP session (one per process, reused across reruns) ---
+@st.cache_resource(show_spinner=False)
+def get_session():
+    """Build the pooled, retrying requests.Session used for every fetch."""
+    session = requests.Session()
+    session.headers.update({"User-Agent": USER_AGENT})
+    session.mount("https://", HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        # 429 is not retried: a rate-limited page fails fast into the
+        # per-page warning instead of hammering Yelp through the block
+        max_retries=Retry(total=3, backoff_factor=0.5,
+                          status_forcelist=[502, 503, 504]),
+    ))
+    return session
+
+# --- Helper: on-disk cache next to this file (survives Streamlit restarts) ---
+@st.cache_resource(show_spinner=False)
+def get_disk_cache():
+    """Open the diskcache store shared by every run of this app."""
+    return Cache(Path(__file__).parent / ".cache")
+
+# --- Helper: normalize a phone number found in text ---
+def extract_phone(text: str) -> str:
+    """Return the first US phone number in text as '(XXX) XXX-XXXX', or ''."""
+    m = _PHONE_RE.search(text)
+    if not m:
+        return ""
+    digits = _NON_DIGIT_RE.sub("", m.group())
+    if len(digits) == 11:
+        digits = digits[1:]  # the pattern only allows a leading country code 1
+    return f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"
+
 # --- Helper: scrape one Yelp page ---
-@st.cache_data(ttl=300)
+# show_spinner=False: pages are fetched from worker threads under one spinner
+@st.cache_data(ttl=MEMORY_TTL, show_spinner=False)
+@get_disk_cache().memoize(expire=CACHE_TTL - MEMORY_TTL)
 def scrape_yelp(zip_code: str, page: int):
-    """Scrape Yelp 'Newest' for one page (20 items)."""
+    """Scrape Yelp 'Newest' for one page (20 items) as LEAD_COLUMNS tuples."""
     offset = (page - 1) * 20
     url = (
         f"https://www.yelp.com/search?find_loc={quote_plus(zip_code)}"
         f"&sortby=date_desc&start={offset}"
     )
-    headers = {
-        "User-Agent": "Mozilla/5.0 (compatible; LeadFinder/1.0)"
-    }
-    r = requests.get(url, headers=headers, timeout=10)
+    r = get_session().get(url, timeout=10)
     r.raise_for_status()
-    soup = BeautifulSoup(r.text, "html.parser")
-    cards = soup.select("div.container__09f24__21w3G")  # each business card
+    tree = HTMLParser(r.text)
+    cards = tree.css("div.container__09f24__21w3G")  # each business card
     results = []
     for c in cards:
         # name
-        name_tag = c.select_one("a.css-166la90")
+        name_tag = c.css_first("a.css-166la90")
         if not name_tag:
             continue
-        name = name_tag.text.strip()
-        # Yelp profile link
-        link = name_tag["href"]
+        name = name_tag.text().strip()
+        # Yelp profile link (a bare <a href> has a None value)
+        link = name_tag.attributes.get("href") or ""
+        if not link:
+            continue
         # address
-        addr = c.select_one("span.css-e81eai")
-        address = addr.text.strip() if addr else ""
+        addr = c.css_first("span.css-e81eai")
+        address = addr.text().strip() if addr else ""
         # phone
         phone = ""
-        ph = c.find("p", string=re.compile(r"\(\d{3}\)\s*\d{3}-\d{4}"))
-        if ph:
-            phone = ph.text.strip()
+        for p in c.css("p"):
+            # separate child text nodes so "Call<b>(555)</b>..." isn't glued
+            phone = extract_phone(p.text(separator=" ", strip=True))
+            if phone:
+                break
         # website link presence
         # some cards include a "Business website" link icon
-        ws = bool(c.select_one("a[href*='biz_redir?url=']"))
-        results.append({
-            "Name": name,
-            "Yelp Link": "https://yelp.com" + link,
-            "Address": address,
-            "Phone": phone,
-            "Has Website": ws
-        })
+        ws = c.css_first("a[href*='biz_redir?url=']") is not None
+        results.append((name, "https://yelp.com" + link, address, phone, ws))
     return results
 
 # --- Main fetch & process ---
 if st.session_state.fetch:
-    all_leads = []
+    by_page = {}
     with st.spinner("Scraping Yelp..."):
-        for pg in range(1, pages + 1):
-            try:
-                page_data = scrape_yelp(zip_code, pg)
-                all_leads.extend(page_data)
-            except Exception as e:
-                st.warning(f"Page {pg} failed: {e}")
-    # filter for Has Website == False
-    df = pd.DataFrame(all_leads)
+        # pages are independent requests, so fetch them all at once
+        with ThreadPoolExecutor(max_workers=pages) as ex:
+            futures = {
+                ex.submit(scrape_yelp, zip_code, pg): pg
+                for pg in range(1, pages + 1)
+            }
+            for fut in as_completed(futures):
+                pg = futures[fut]
+                try:
+                    by_page[pg] = fut.result()
+                except Exception as e:
+                    st.warning(f"Page {pg} failed: {e}")
+    # keep Yelp's page order regardless of completion order
+    all_leads = [lead for pg in sorted(by_page) for lead in by_page[pg]]
+    df = pd.DataFrame.from_records(all_leads, columns=LEAD_COLUMNS)
+    # new listings shift pages between fetches, so a card can show up twice
+    df = df.drop_duplicates(subset="Yelp Link", keep="first")
     if df.empty:
         st.error("No results returned from Yelp. Try expanding pages.")
         st.stop()
+    # filter for Has Website == False
     df = df[df["Has Website"] == False].copy()
     if df.empty:
         st.warning("All recent businesses have websites listed on Yelp.")
@@ -88,6 +149,8 @@ if st.session_state.fetch:
 
     df["Call Link"] = df["Phone"].apply(lambda p: f"tel:{p}" if p else "")
     df = df[["Name", "Address", "Phone", "Call Link", "Yelp Link"]]
+    # Arrow-backed strings let st.dataframe ship columns without re-encoding
+    df = df.convert_dtypes(dtype_backend="pyarrow")
 
     st.header(f"{len(df)} Fresh Leads without Websites")
     st.dataframe(df)